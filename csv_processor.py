@@ -1,57 +1,118 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from geopy.geocoders import Nominatim
+from geopy.adapters import AioHTTPAdapter
+from geopy.extra.rate_limiter import AsyncRateLimiter
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-import time
+import asyncio
 import re
+from functools import lru_cache
 import json
 import os
+import pickle
 from tqdm import tqdm
 
 # Cache for storing geocoding results
-CACHE_FILE = 'geocoding_cache.json'
+CACHE_FILE = 'geocoding_cache.pkl'
+LEGACY_CACHE_FILE = 'geocoding_cache.json'
+
+# Nominatim usage policy allows 1 request/second; set to 0 when self-hosting
+GEOCODE_MIN_DELAY = 1.0
+MAX_CONCURRENT_REQUESTS = 10
+
+# Number of addresses geocoded between cache checkpoints
+BATCH_SIZE = 500
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ['Address', 'County', 'Description of Property', 'Property Size Description']
 
 
 def load_cache():
     if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'r') as f:
+        with open(CACHE_FILE, 'rb') as f:
+            return pickle.load(f)
+    # Fall back to the cache written by earlier versions
+    if os.path.exists(LEGACY_CACHE_FILE):
+        with open(LEGACY_CACHE_FILE, 'r') as f:
             return json.load(f)
     return {}
 
 
 def save_cache(cache):
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(cache, f)
-
-
-def clean_price(price_str):
-    try:
-        number = re.sub(r'[^0-9]', '', str(price_str))
-        return float(number) / 100
-    except:
-        return None
+    with open(CACHE_FILE, 'wb') as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def clean_prices(prices):
+    """Convert a column of price strings (e.g. '250,000.00') to floats."""
+    digits = prices.astype(str).str.replace(r'[^0-9]', '', regex=True)
+    return pd.to_numeric(digits, errors='coerce') / 100
+
+
+# Dublin area names and postcodes to standardize
+AREA_MAPPINGS = {
+    'DUBLIN 1': 'D1', 'DUBLIN 2': 'D2', 'DUBLIN 3': 'D3', 'DUBLIN 4': 'D4',
+    'DUBLIN 5': 'D5', 'DUBLIN 6': 'D6', 'DUBLIN 7': 'D7', 'DUBLIN 8': 'D8',
+    'DUBLIN 9': 'D9', 'DUBLIN 10': 'D10', 'DUBLIN 11': 'D11', 'DUBLIN 12': 'D12',
+    'DUBLIN 13': 'D13', 'DUBLIN 14': 'D14', 'DUBLIN 15': 'D15', 'DUBLIN 16': 'D16',
+    'DUBLIN 17': 'D17', 'DUBLIN 18': 'D18', 'DUBLIN 20': 'D20', 'DUBLIN 22': 'D22',
+    'DUBLIN 24': 'D24',
+    'BAC': 'Dublin',  # Irish language
+    'BAILE ATHA CLIATH': 'Dublin',
+    'CO DUBLIN': 'County Dublin',
+    'CO. DUBLIN': 'County Dublin'
+}
+
+# Prefixes stripped from the start of an address
+PREFIXES_TO_REMOVE = [
+    r'^(APT|APARTMENT|UNIT|NO\.|FLAT)\s*\.?\s*\d+\s*,?\s*',
+    r'^\d+[A-Z]?\s*,?\s*',
+    r'APT\.?\s*\d+\s*-?\s*',
+]
+
+# Common abbreviations and their full forms
+REPLACEMENTS = {
+    'RD': 'ROAD',
+    'ST': 'STREET',
+    'AVE': 'AVENUE',
+    'APTS': 'APARTMENTS',
+    'DR': 'DRIVE',
+    'LN': 'LANE',
+    'CT': 'COURT',
+    'CRES': 'CRESCENT',
+    'SQ': 'SQUARE',
+    'PK': 'PARK',
+    'GDNS': 'GARDENS',
+    'APT': 'APARTMENT'
+}
+
+
+def _alternation(keys):
+    """Compile keys into a single word-bounded alternation, longest first."""
+    keys = sorted(keys, key=len, reverse=True)
+    return re.compile(r'\b(' + '|'.join(re.escape(key) for key in keys) + r')\b', re.IGNORECASE)
+
+
+# Patterns are compiled once at import time rather than on every address
+_AREA_MAP = {old.upper(): new for old, new in AREA_MAPPINGS.items()}
+_AREA_RE = _alternation(_AREA_MAP)
+_PREFIX_RES = [re.compile(prefix, re.IGNORECASE) for prefix in PREFIXES_TO_REMOVE]
+_REPLACEMENT_MAP = {abbr.upper(): full for abbr, full in REPLACEMENTS.items()}
+_REPLACEMENT_RE = _alternation(_REPLACEMENT_MAP)
+_COMMA_WS_RE = re.compile(r'\s+,\s+')
+_WS_RE = re.compile(r'\s+')
+_SIMPLIFY_RE = re.compile(r',.*(?:Dublin|\bD\d{1,2}W?\b)')  # Up to the last Dublin or postcode token
+_FIRST_TWO_PARTS_RE = re.compile(r'^([^,]+,[^,]+)')
+_DUBLIN_RE = re.compile(r'\b(?:DUBLIN|D\d{1,2}W?\b)', re.IGNORECASE)
 
 
 def standardize_dublin_areas(address):
     """Standardize Dublin area names and postcodes."""
-    area_mappings = {
-        'DUBLIN 1': 'D1', 'DUBLIN 2': 'D2', 'DUBLIN 3': 'D3', 'DUBLIN 4': 'D4',
-        'DUBLIN 5': 'D5', 'DUBLIN 6': 'D6', 'DUBLIN 7': 'D7', 'DUBLIN 8': 'D8',
-        'DUBLIN 9': 'D9', 'DUBLIN 10': 'D10', 'DUBLIN 11': 'D11', 'DUBLIN 12': 'D12',
-        'DUBLIN 13': 'D13', 'DUBLIN 14': 'D14', 'DUBLIN 15': 'D15', 'DUBLIN 16': 'D16',
-        'DUBLIN 17': 'D17', 'DUBLIN 18': 'D18', 'DUBLIN 20': 'D20', 'DUBLIN 22': 'D22',
-        'DUBLIN 24': 'D24',
-        'BAC': 'Dublin',  # Irish language
-        'BAILE ATHA CLIATH': 'Dublin',
-        'CO DUBLIN': 'County Dublin',
-        'CO. DUBLIN': 'County Dublin'
-    }
-
-    for old, new in area_mappings.items():
-        address = re.sub(fr'\b{old}\b', new, address, flags=re.IGNORECASE)
-
-    return address
+    return _AREA_RE.sub(lambda m: _AREA_MAP[m.group(1).upper()], address)
 
 
+@lru_cache(maxsize=100_000)
 def clean_address(address):
     """Enhanced address cleaning for better geocoding."""
     if not isinstance(address, str):
@@ -61,43 +122,21 @@ def clean_address(address):
     address = address.upper()
 
     # Remove specific prefixes
-    prefixes_to_remove = [
-        r'^(APT|APARTMENT|UNIT|NO\.|FLAT)\s*\.?\s*\d+\s*,?\s*',
-        r'^\d+[A-Z]?\s*,?\s*',
-        r'APT\.?\s*\d+\s*-?\s*',
-    ]
-
-    for prefix in prefixes_to_remove:
-        address = re.sub(prefix, '', address, flags=re.IGNORECASE)
+    for pattern in _PREFIX_RES:
+        address = pattern.sub('', address)
 
     # Standardize common terms
-    replacements = {
-        'RD': 'ROAD',
-        'ST': 'STREET',
-        'AVE': 'AVENUE',
-        'APTS': 'APARTMENTS',
-        'DR': 'DRIVE',
-        'LN': 'LANE',
-        'CT': 'COURT',
-        'CRES': 'CRESCENT',
-        'SQ': 'SQUARE',
-        'PK': 'PARK',
-        'GDNS': 'GARDENS',
-        'APT': 'APARTMENT'
-    }
-
-    for abbr, full in replacements.items():
-        address = re.sub(fr'\b{abbr}\b', full, address)
+    address = _REPLACEMENT_RE.sub(lambda m: _REPLACEMENT_MAP[m.group(1).upper()], address)
 
     # Clean up any extra commas and spaces
-    address = re.sub(r'\s+,\s+', ', ', address)
-    address = re.sub(r'\s+', ' ', address)
+    address = _COMMA_WS_RE.sub(', ', address)
+    address = _WS_RE.sub(' ', address)
 
     # Standardize Dublin areas
     address = standardize_dublin_areas(address)
 
     # Ensure it ends with Dublin, Ireland if not already present
-    if 'DUBLIN' not in address and 'D\d{1,2}' not in address:
+    if not _DUBLIN_RE.search(address):
         address += ', DUBLIN'
     if 'IRELAND' not in address:
         address += ', IRELAND'
@@ -105,22 +144,31 @@ def clean_address(address):
     return address.title()
 
 
-def get_coordinates(address, geolocator):
+async def get_coordinates(address, geocode):
     """Enhanced geocoding with better fallback options."""
     original_address = address
     tries = [
         lambda addr: addr,  # Try full address
-        lambda addr: re.sub(r',.*Dublin', ', Dublin', addr),  # Simplify to main street + Dublin
-        lambda addr: re.match(r'^([^,]+,[^,]+)', addr).group(1) + ', Dublin, Ireland'  # Just first two parts
+        lambda addr: _SIMPLIFY_RE.sub(', Dublin', addr),  # Simplify to main street + Dublin
+        lambda addr: _FIRST_TWO_PARTS_RE.match(addr).group(1) + ', Dublin, Ireland'  # Just first two parts
     ]
 
-    for try_num, address_modifier in enumerate(tries):
+    # Clean once; each fallback only transforms the cleaned address
+    cleaned_address = clean_address(original_address)
+
+    # Build the distinct search variants so identical fallbacks aren't queried twice
+    variants = []
+    for address_modifier in tries:
         try:
-            cleaned_address = clean_address(original_address)
-            search_address = address_modifier(cleaned_address)
+            variant = address_modifier(cleaned_address)
+        except Exception:
+            continue
+        if variant not in variants:
+            variants.append(variant)
 
-            time.sleep(1)  # Respect usage limits
-            location = geolocator.geocode(search_address)
+    for try_num, search_address in enumerate(variants):
+        try:
+            location = await geocode(search_address)
 
             if location:
                 # Verify it's in Dublin area (approximate bounding box)
@@ -129,7 +177,7 @@ def get_coordinates(address, geolocator):
                     return location.latitude, location.longitude
 
         except (GeocoderTimedOut, GeocoderServiceError) as e:
-            if try_num == len(tries) - 1:
+            if try_num == len(variants) - 1:
                 print(f"Failed to geocode {original_address}: {str(e)}")
             continue
         except Exception as e:
@@ -139,6 +187,43 @@ def get_coordinates(address, geolocator):
     return None, None
 
 
+async def geocode_batch(addresses, geocode, semaphore, cache):
+    """Geocode a batch of addresses concurrently, returning {address: coords}.
+
+    Each result is written to the cache as soon as its lookup finishes.
+    """
+    async def geocode_one(address):
+        async with semaphore:
+            coords = await get_coordinates(address, geocode)
+        cache[address] = coords
+        return address, coords
+
+    return dict(await asyncio.gather(*(geocode_one(address) for address in addresses)))
+
+
+async def geocode_addresses(addresses, cache, user_agent="dublin_property_processor"):
+    """Geocode addresses in batches through a single rate-limited geolocator.
+
+    The cache is saved after each batch and again on exit, so an interrupted run
+    keeps every completed lookup and can resume.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    batches = [addresses[i:i + BATCH_SIZE] for i in range(0, len(addresses), BATCH_SIZE)]
+
+    async with Nominatim(user_agent=user_agent, adapter_factory=AioHTTPAdapter) as geolocator:
+        # The limiter serializes calls, so the delay applies across all tasks
+        geocode = AsyncRateLimiter(geolocator.geocode, min_delay_seconds=GEOCODE_MIN_DELAY,
+                                   swallow_exceptions=False)
+
+        try:
+            for batch in tqdm(batches):
+                await geocode_batch(batch, geocode, semaphore, cache)
+                save_cache(cache)
+        finally:
+            # Persist whatever was geocoded, even if the run was interrupted mid-batch
+            save_cache(cache)
+
+
 def process_csv(input_file, output_file, max_rows=None):
     """Process the CSV file with enhanced geocoding."""
     # Read the CSV file
@@ -148,41 +233,37 @@ def process_csv(input_file, output_file, max_rows=None):
         df = df.head(max_rows)
         print(f"Processing first {max_rows} rows...")
 
-    # Convert date and extract month/year
-    df['Date of Sale (dd/mm/yyyy)'] = pd.to_datetime(df['Date of Sale (dd/mm/yyyy)'], format='%d/%m/%Y')
-    df['Sale_Month'] = df['Date of Sale (dd/mm/yyyy)'].dt.month
-    df['Sale_Year'] = df['Date of Sale (dd/mm/yyyy)'].dt.year
-    df['Date of Sale (dd/mm/yyyy)'] = df['Date of Sale (dd/mm/yyyy)'].dt.strftime('%d/%m/%Y')
+    # Store repetitive text columns as categories so each distinct value is handled once
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype('category')
 
-    # Clean price
-    df['Price_Cleaned'] = df.iloc[:, 4].apply(clean_price)
+    # Convert date and extract month/year, parsing each distinct date only once
+    sale_dates = df['Date of Sale (dd/mm/yyyy)']
+    unique_dates = sale_dates.unique()
+    date_map = pd.Series(pd.to_datetime(unique_dates, format='%d/%m/%Y'), index=unique_dates)
+    parsed_dates = sale_dates.map(date_map)
+    df['Sale_Month'] = parsed_dates.dt.month
+    df['Sale_Year'] = parsed_dates.dt.year
 
-    # Initialize coordinate columns
-    df['Latitude'] = None
-    df['Longitude'] = None
+    # Clean price
+    df['Price_Cleaned'] = clean_prices(df.iloc[:, 4])
 
     # Load cache
     cache = load_cache()
 
     # Process unique addresses
-    unique_addresses = list(set(df['Address'].unique()) - set(cache.keys()))
+    unique_addresses = [a for a in df['Address'].cat.categories if a and a not in cache]
 
     if unique_addresses:
         print(f"\nProcessing {len(unique_addresses)} unique addresses...")
-        geolocator = Nominatim(user_agent="dublin_property_processor")
-
-        for address in tqdm(unique_addresses):
-            if address and address not in cache:
-                coords = get_coordinates(address, geolocator)
-                cache[address] = coords
-                save_cache(cache)
+        asyncio.run(geocode_addresses(unique_addresses, cache))
 
     # Update DataFrame coordinates
     print("\nUpdating coordinates in DataFrame...")
-    for idx, row in df.iterrows():
-        address = row['Address']
-        if address in cache:
-            df.at[idx, 'Latitude'], df.at[idx, 'Longitude'] = cache[address]
+    # Look up each category once, then expand to rows by category code (-1 for missing)
+    coords = pd.DataFrame([cache.get(a, (None, None)) for a in df['Address'].cat.categories],
+                          columns=['Latitude', 'Longitude'])
+    df[['Latitude', 'Longitude']] = coords.reindex(df['Address'].cat.codes).to_numpy()
 
     # Select and reorder columns
     columns_to_keep = ['Date of Sale (dd/mm/yyyy)', 'Sale_Month', 'Sale_Year',
@@ -197,7 +278,7 @@ def process_csv(input_file, output_file, max_rows=None):
     print(df[['Date of Sale (dd/mm/yyyy)', 'Sale_Month', 'Sale_Year',
               'Address', 'Price_Cleaned', 'Latitude', 'Longitude']].head())
 
-    df.to_csv(output_file, index=False)
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), output_file)
     print(f"\nProcessing complete. Results saved to {output_file}")
 
 
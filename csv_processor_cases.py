@@ -1,26 +1,75 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from geopy.geocoders import Nominatim
+from geopy.adapters import AioHTTPAdapter
+from geopy.extra.rate_limiter import AsyncRateLimiter
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-import time
+import asyncio
 import re
 import json
 import os
+import pickle
 from tqdm import tqdm
 
 # Cache for storing geocoding results
-CACHE_FILE = 'geocoding_cache.json'
+CACHE_FILE = 'geocoding_cache.pkl'
+LEGACY_CACHE_FILE = 'geocoding_cache.json'
+
+# Nominatim usage policy allows 1 request/second; set to 0 when self-hosting
+GEOCODE_MIN_DELAY = 1.0
+MAX_CONCURRENT_REQUESTS = 10
+
+# Number of addresses geocoded between cache checkpoints
+BATCH_SIZE = 500
 
 
 def load_cache():
     if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'r') as f:
+        with open(CACHE_FILE, 'rb') as f:
+            return pickle.load(f)
+    # Fall back to the cache written by earlier versions
+    if os.path.exists(LEGACY_CACHE_FILE):
+        with open(LEGACY_CACHE_FILE, 'r') as f:
             return json.load(f)
     return {}
 
 
 def save_cache(cache):
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(cache, f)
+    with open(CACHE_FILE, 'wb') as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# Markers after which long planning addresses are truncated
+ADDRESS_MARKERS = [" on lands at ", " The application site consists of ", " The Lands comprise of "]
+
+# Patterns that often cause geocoding issues
+PATTERNS_TO_REMOVE = [
+    r'\([^)]*\)',  # Remove anything in parentheses
+    r'Protected Structure',
+    r'Site to the rear of',
+    r'Site to the north of',
+    r'Public grass verge',
+    r'Former',
+    r'The application site',
+    r'\b[A-Z]\d{2}\s*[A-Z0-9]{4}\b',  # Remove Eircode
+    r'Co\.\s*Dublin',  # Remove Co. Dublin as we'll add Dublin later
+    r'&\s*\.\.\.',  # Remove truncated parts
+    r'Within the curtilage of',
+    r'[^,]*\b(Service Station|Public House)\b',  # Remove business names
+]
+
+# Patterns are compiled once at import time rather than on every address
+_REMOVE_RES = [re.compile(pattern, re.IGNORECASE) for pattern in PATTERNS_TO_REMOVE]
+_JUNCTION_ROADS_RE = re.compile(r'([^,]+(?:Road|Street|Avenue|Lane))')
+_WS_RE = re.compile(r'\s+')
+_EMPTY_ELEMENT_RE = re.compile(r',\s*,')
+_LEADING_COMMA_RE = re.compile(r'^\s*,\s*')
+_TRAILING_COMMA_RE = re.compile(r'\s*,\s*$')
+_SIMPLIFY_RE = re.compile(r',.*Dublin')
+_FIRST_PART_RE = re.compile(r'(.*?),.*?(Dublin.*)')
+_DUBLIN_RE = re.compile(r'\b(?:DUBLIN|D\d{1,2}W?\b)', re.IGNORECASE)
+_STREET_RE = re.compile(r'([^,]+(?:Road|Street|Avenue|Lane|Rise|Park|Place|Drive|Grove|Way))')
 
 
 def clean_address_for_planning(address):
@@ -29,45 +78,29 @@ def clean_address_for_planning(address):
         return ""
 
     # Truncate very long addresses at certain markers
-    markers = [" on lands at ", " The application site consists of ", " The Lands comprise of "]
-    for marker in markers:
+    for marker in ADDRESS_MARKERS:
         if marker.lower() in address.lower():
             address = address.split(marker)[0]
 
     # Remove specific patterns that often cause issues
-    patterns_to_remove = [
-        r'\([^)]*\)',  # Remove anything in parentheses
-        r'Protected Structure',
-        r'Site to the rear of',
-        r'Site to the north of',
-        r'Public grass verge',
-        r'Former',
-        r'The application site',
-        r'\b[A-Z]\d{2}\s*[A-Z0-9]{4}\b',  # Remove Eircode
-        r'Co\.\s*Dublin',  # Remove Co. Dublin as we'll add Dublin later
-        r'&\s*\.\.\.',  # Remove truncated parts
-        r'Within the curtilage of',
-        r'[^,]*\b(Service Station|Public House)\b',  # Remove business names
-    ]
-
-    for pattern in patterns_to_remove:
-        address = re.sub(pattern, '', address, flags=re.IGNORECASE)
+    for pattern in _REMOVE_RES:
+        address = pattern.sub('', address)
 
     # Handle special cases
     if 'junction' in address.lower():
         # For junctions, keep only the main road names
-        roads = re.findall(r'([^,]+(?:Road|Street|Avenue|Lane))', address)
+        roads = _JUNCTION_ROADS_RE.findall(address)
         if roads:
             address = ' and '.join(roads)
 
     # Clean up and standardize
-    address = re.sub(r'\s+', ' ', address)  # Remove extra spaces
-    address = re.sub(r',\s*,', ',', address)  # Remove empty elements
-    address = re.sub(r'^\s*,\s*', '', address)  # Remove leading comma
-    address = re.sub(r'\s*,\s*$', '', address)  # Remove trailing comma
+    address = _WS_RE.sub(' ', address)  # Remove extra spaces
+    address = _EMPTY_ELEMENT_RE.sub(',', address)  # Remove empty elements
+    address = _LEADING_COMMA_RE.sub('', address)  # Remove leading comma
+    address = _TRAILING_COMMA_RE.sub('', address)  # Remove trailing comma
 
     # Ensure it ends with Dublin, Ireland
-    if not any(x in address.upper() for x in ['DUBLIN', 'D1', 'D2', 'D3', 'D4', 'D5', 'D6', 'D7', 'D8', 'D9']):
+    if not _DUBLIN_RE.search(address):
         address += ', Dublin'
     if 'IRELAND' not in address.upper():
         address += ', Ireland'
@@ -75,7 +108,7 @@ def clean_address_for_planning(address):
     return address.strip()
 
 
-def get_coordinates(address, geolocator):
+async def get_coordinates(address, geocode):
     """Enhanced geocoding with better fallback options for planning applications."""
     original_address = address
 
@@ -88,20 +121,22 @@ def get_coordinates(address, geolocator):
     # Generate address variants
     address_variants = [
         cleaned_address,  # Try full cleaned address
-        re.sub(r',.*Dublin', ', Dublin', cleaned_address),  # Just main location + Dublin
-        re.sub(r'(.*?),.*?(Dublin.*)', r'\1, \2', cleaned_address),  # First part + Dublin
+        _SIMPLIFY_RE.sub(', Dublin', cleaned_address),  # Just main location + Dublin
+        _FIRST_PART_RE.sub(r'\1, \2', cleaned_address),  # First part + Dublin
     ]
 
     # If we have a street name, try just the street + Dublin
-    street_match = re.search(r'([^,]+(?:Road|Street|Avenue|Lane|Rise|Park|Place|Drive|Grove|Way))', cleaned_address)
+    street_match = _STREET_RE.search(cleaned_address)
     if street_match:
         address_variants.append(f"{street_match.group(1)}, Dublin, Ireland")
 
+    # Drop identical variants so the same query isn't sent twice
+    address_variants = list(dict.fromkeys(address_variants))
+
     # Try each variant
     for variant in address_variants:
         try:
-            time.sleep(1)  # Respect usage limits
-            location = geolocator.geocode(variant)
+            location = await geocode(variant)
 
             if location:
                 # Verify it's in greater Dublin area (expanded bounding box)
@@ -118,6 +153,48 @@ def get_coordinates(address, geolocator):
     return None, None
 
 
+async def geocode_batch(addresses, geocode, semaphore, cache):
+    """Geocode a batch of addresses concurrently, returning {address: coords}.
+
+    Each result is written to the cache as soon as its lookup finishes.
+    """
+    async def geocode_one(address):
+        async with semaphore:
+            coords = await get_coordinates(address, geocode)
+        cache[address] = coords
+        return address, coords
+
+    return dict(await asyncio.gather(*(geocode_one(address) for address in addresses)))
+
+
+async def geocode_addresses(addresses, cache, user_agent="dublin_planning_processor"):
+    """Geocode addresses in batches through a single rate-limited geolocator.
+
+    The cache is saved after each batch and again on exit, so an interrupted run
+    keeps every completed lookup and can resume.
+    Returns the number of addresses that were successfully geocoded.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    batches = [addresses[i:i + BATCH_SIZE] for i in range(0, len(addresses), BATCH_SIZE)]
+    success_count = 0
+
+    async with Nominatim(user_agent=user_agent, adapter_factory=AioHTTPAdapter) as geolocator:
+        # The limiter serializes calls, so the delay applies across all tasks
+        geocode = AsyncRateLimiter(geolocator.geocode, min_delay_seconds=GEOCODE_MIN_DELAY,
+                                   swallow_exceptions=False)
+
+        try:
+            for batch in tqdm(batches):
+                results = await geocode_batch(batch, geocode, semaphore, cache)
+                success_count += sum(coords[0] is not None for coords in results.values())
+                save_cache(cache)
+        finally:
+            # Persist whatever was geocoded, even if the run was interrupted mid-batch
+            save_cache(cache)
+
+    return success_count
+
+
 def process_planning_cases(input_file, output_file, max_rows=None):
     """Process the planning cases CSV file with enhanced geocoding."""
     # Read the CSV file
@@ -127,31 +204,18 @@ def process_planning_cases(input_file, output_file, max_rows=None):
         df = df.head(max_rows)
         print(f"Processing first {max_rows} rows...")
 
-    # Initialize coordinate columns
-    df['Latitude'] = None
-    df['Longitude'] = None
-
     # Load cache
     cache = load_cache()
 
     # Process unique addresses
-    unique_addresses = list(set(df.iloc[:, 1].dropna().unique()) - set(cache.keys()))
+    unique_addresses = [a for a in df.iloc[:, 1].dropna().unique() if a and a not in cache]
 
     if unique_addresses:
         print(f"\nProcessing {len(unique_addresses)} unique addresses...")
-        geolocator = Nominatim(user_agent="dublin_planning_processor")
 
         # Track success rate
-        success_count = 0
         total_count = len(unique_addresses)
-
-        for address in tqdm(unique_addresses):
-            if address and address not in cache:
-                coords = get_coordinates(address, geolocator)
-                cache[address] = coords
-                if coords[0] is not None:
-                    success_count += 1
-                save_cache(cache)
+        success_count = asyncio.run(geocode_addresses(unique_addresses, cache))
 
         # Print success rate
         success_rate = (success_count / total_count) * 100
@@ -159,10 +223,9 @@ def process_planning_cases(input_file, output_file, max_rows=None):
 
     # Update DataFrame coordinates
     print("\nUpdating coordinates in DataFrame...")
-    for idx, row in df.iterrows():
-        address = row.iloc[1]  # Column B (index 1)
-        if address in cache:
-            df.at[idx, 'Latitude'], df.at[idx, 'Longitude'] = cache[address]
+    coords = df.iloc[:, 1].map(cache).dropna()  # Column B (index 1)
+    df[['Latitude', 'Longitude']] = pd.DataFrame(coords.tolist(), index=coords.index,
+                                                 columns=['Latitude', 'Longitude']).reindex(df.index)
 
     # Move Latitude and Longitude columns to position K (index 10)
     cols = list(df.columns)
@@ -183,7 +246,7 @@ def process_planning_cases(input_file, output_file, max_rows=None):
     print("\nSample of processed data:")
     print(df.iloc[:, [1, 10, 11]].head())
 
-    df.to_csv(output_file, index=False)
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), output_file)
     print(f"\nProcessing complete. Results saved to {output_file}")
 
 
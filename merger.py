@@ -1,6 +1,23 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from pathlib import Path
 
+
+def read_csv_table(file):
+    """
+    Read a latin-1 encoded CSV into a pyarrow Table of string columns, falling back to pandas on parse errors.
+    """
+    try:
+        table = pacsv.read_csv(str(file), read_options=pacsv.ReadOptions(encoding='latin-1'))
+    except pa.ArrowInvalid:
+        df = pd.read_csv(file, encoding='latin-1', dtype=str)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Types are inferred per file and may conflict (e.g. int64 vs string), so keep every column as text
+    return table.cast(pa.schema([(name, pa.string()) for name in table.column_names]))
+
+
 def merge_csv_files(input_directory, output_file):
     """
     Merge multiple CSV files vertically (one below the other).
@@ -15,31 +32,29 @@ def merge_csv_files(input_directory, output_file):
 
         print(f"Found {len(csv_files)} CSV files")
 
-        # Initialize an empty list to store individual dataframes
-        dfs = []
+        # Initialize an empty list to store individual tables
+        tables = []
 
         # Read each CSV file with latin-1 encoding
         for file in csv_files:
             try:
-                # Try reading with latin-1 encoding
-                df = pd.read_csv(file, encoding='latin-1')
-                dfs.append(df)
+                tables.append(read_csv_table(file))
                 print(f"Successfully read: {file.name}")
             except Exception as e:
                 print(f"Error reading {file.name}: {str(e)}")
                 continue
 
-        if not dfs:
+        if not tables:
             print("No data frames to merge!")
             return False
 
-        # Concatenate all dataframes vertically
-        merged_df = pd.concat(dfs, axis=0, ignore_index=True)
+        # Concatenate all tables vertically, filling columns missing from some files with nulls
+        merged_table = pa.concat_tables(tables, promote_options='default')
 
-        # Save the merged dataframe
-        merged_df.to_csv(output_file, index=False, encoding='utf-8')
+        # Save the merged table (pyarrow always writes UTF-8)
+        pacsv.write_csv(merged_table, output_file)
         print(f"\nMerged CSV file saved as: {output_file}")
-        print(f"Total rows in merged file: {len(merged_df)}")
+        print(f"Total rows in merged file: {merged_table.num_rows}")
 
         return True
 
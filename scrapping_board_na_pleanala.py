@@ -1,14 +1,14 @@
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import re
 import requests
-import time
 
 
-def scrape_cases_from_url(url):
-    # Fetch the webpage content
+def scrape_cases_from_url(url, session=None):
+    # Fetch the webpage content, reusing the session's connections if given
     print(f"Scraping URL: {url}")
-    response = requests.get(url)
+    response = (session or requests).get(url, timeout=30)
     if response.status_code != 200:
         print(f"Failed to fetch the webpage. Status code: {response.status_code}")
         return []
@@ -16,31 +16,44 @@ def scrape_cases_from_url(url):
     return scrape_cases_from_html(response.text)
 
 
+# Matches the label and value of a case details span, e.g. "Status: Case is closed"
+_DETAIL_RE = re.compile(r'(Case reference|Status|Description|Date lodged|EIAR|NIS):\s*(.*)', re.DOTALL)
+
+# Case fields filled directly from a details label
+DETAIL_FIELDS = {
+    'Case reference': 'reference',
+    'Status': 'status',
+    'Description': 'description',
+    'EIAR': 'eiar',
+    'NIS': 'nis',
+}
+
+
 def scrape_cases_from_html(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = BeautifulSoup(html_content, 'lxml')
     cases = []
 
     # Find all case divs
-    case_divs = soup.find_all('div', class_='cell')
+    case_divs = soup.select('div.cell')
 
     for case_div in case_divs:
         case = {}
 
         # Get the case link element
-        case_link = case_div.find('a', class_='card-item')
+        case_link = case_div.select_one('a.card-item')
         if not case_link:
             continue
 
         # Get case type (meta)
-        meta = case_div.find('span', class_='meta')
+        meta = case_div.select_one('span.meta')
         case['type'] = meta.text.strip() if meta else ''
 
         # Get title
-        title = case_div.find('span', class_='title')
+        title = case_div.select_one('span.title')
         case['title'] = title.text.strip() if title else ''
 
         # Get all details spans
-        details_spans = case_div.find_all('span', class_='details')
+        details_spans = case_div.select('span.details')
 
         # Initialize default values
         case['reference'] = ''
@@ -53,31 +66,26 @@ def scrape_cases_from_html(html_content):
 
         # Process each details span
         for span in details_spans:
-            text = span.text.strip()
-
-            if 'Case reference:' in text:
-                case['reference'] = text.split('Case reference:')[1].strip()
-            elif 'Status:' in text:
-                case['status'] = text.split('Status:')[1].strip()
-            elif 'Description:' in text:
-                case['description'] = text.split('Description:')[1].strip()
-            elif 'Date lodged:' in text:
+            match = _DETAIL_RE.search(span.text.strip())
+            if not match:
+                continue
+
+            label, value = match.group(1), match.group(2).strip()
+            if label == 'Date lodged':
                 # Extract both lodged and signed dates
-                date_parts = text.split(';')
-                if len(date_parts) >= 1:
-                    case['date_lodged'] = date_parts[0].split('Date lodged:')[1].strip()
-                if len(date_parts) >= 2:
-                    case['date_signed'] = date_parts[1].split('Signed:')[1].strip()
-            elif 'EIAR:' in text:
-                case['eiar'] = text.split('EIAR:')[1].strip()
-            elif 'NIS:' in text:
-                case['nis'] = text.split('NIS:')[1].strip()
+                lodged, _, signed = value.partition(';')
+                case['date_lodged'] = lodged.strip()
+                if signed:
+                    case['date_signed'] = signed.partition('Signed:')[2].strip()
+            else:
+                case[DETAIL_FIELDS[label]] = value
 
         # Get parties
-        parties_div = case_div.find('div', class_='details')
-        if parties_div and parties_div.find('ul'):
+        parties_div = case_div.select_one('div.details')
+        party_list = parties_div.select_one('ul') if parties_div else None
+        if party_list:
             parties = []
-            party_items = parties_div.find('ul').find_all('li')
+            party_items = party_list.select('li')
             for party in party_items:
                 party_text = ' '.join(party.stripped_strings)
                 parties.append(party_text)
@@ -112,27 +120,29 @@ def main():
         "https://www.pleanala.ie/en-ie/cases?lodgedto=2024-11-07&decisionfrom=2024-10-02&decisionto=2024-11-07&county=6"
     ]
 
-    # List to store all cases
+    # List to store all cases, and the references already collected
     all_cases = []
-
-    # Scrape each URL
-    for url in urls:
-        cases = scrape_cases_from_url(url)
-        all_cases.extend(cases)
-        # Add a small delay between requests to be polite to the server
-        time.sleep(2)
-
-    # Save all cases to a single CSV
+    seen_refs = set()
+    duplicate_count = 0
+
+    # Scrape the URLs in parallel; each covers a different date range
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        for cases in executor.map(lambda url: scrape_cases_from_url(url, session), urls):
+            # Skip duplicates (based on case reference) as they are collected
+            for case in cases:
+                if case['reference'] in seen_refs:
+                    duplicate_count += 1
+                    continue
+                seen_refs.add(case['reference'])
+                all_cases.append(case)
+
+    if duplicate_count:
+        print(f"Removed {duplicate_count} duplicate cases")
+
+    # Save all unique cases to a single CSV
     if all_cases:
-        print(f"\nTotal cases found: {len(all_cases)}")
-        df = save_to_csv(all_cases)
-
-        # Remove duplicates if any (based on case reference)
-        df_unique = df.drop_duplicates(subset=['reference'])
-        if len(df_unique) < len(df):
-            print(f"Removed {len(df) - len(df_unique)} duplicate cases")
-            df_unique.to_csv('planning_cases_merged.csv', index=False, encoding='utf-8-sig')
-            print(f"Final number of unique cases: {len(df_unique)}")
+        print(f"\nTotal unique cases found: {len(all_cases)}")
+        save_to_csv(all_cases)
 
 
 if __name__ == "__main__":